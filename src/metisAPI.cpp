@@ -2,16 +2,33 @@
 #include <metis.h>
 #include <vector>
 extern "C" void partitionMetis(idx_t cell_count, idx_t point_count, idx_t *cellptr, idx_t *celldata, idx_t nparts, idx_t *point_partition);
+extern "C" int  partitionMetisOptions(idx_t cell_count, idx_t point_count, idx_t *cellptr, idx_t *celldata, idx_t nparts, idx_t ufactor, idx_t ncuts, idx_t dual, idx_t ncommon, idx_t *point_partition);
 extern "C" int  typewidth();
 
 void partitionMetis(idx_t cell_count, idx_t point_count, idx_t *cellptr, idx_t *celldata, idx_t nparts, idx_t *point_partition)
+{
+  // TODO: Check return value of the function (and potentially add an assert)
+  partitionMetisOptions(cell_count, point_count, cellptr, celldata, nparts, 0, 0, 0, 0, point_partition);
+}
+
+// Non-positive ufactor and ncuts keep the METIS defaults. ncommon is only used for the dual graph (dual != 0).
+// Returns the METIS status code (METIS_OK on success).
+int partitionMetisOptions(idx_t cell_count, idx_t point_count, idx_t *cellptr, idx_t *celldata, idx_t nparts, idx_t ufactor, idx_t ncuts, idx_t dual, idx_t ncommon, idx_t *point_partition)
 {
   idx_t options[METIS_NOPTIONS];
   METIS_SetDefaultOptions(options);
+  if (ufactor > 0) {
+    options[METIS_OPTION_UFACTOR] = ufactor;
+  }
+  if (ncuts > 0) {
+    options[METIS_OPTION_NCUTS] = ncuts;
+  }
   std::vector<idx_t> cell_partition(cell_count);
   idx_t              objval;
-  // TODO: Check return value of the function (and potentially add an assert)
-  METIS_PartMeshNodal(&cell_count, &point_count, cellptr, celldata, 0, 0, &nparts, 0, options, &objval, cell_partition.data(), point_partition);
+  if (dual) {
+    return METIS_PartMeshDual(&cell_count, &point_count, cellptr, celldata, 0, 0, &ncommon, &nparts, 0, options, &objval, cell_partition.data(), point_partition);
+  }
+  return METIS_PartMeshNodal(&cell_count, &point_count, cellptr, celldata, 0, 0, &nparts, 0, options, &objval, cell_partition.data(), point_partition);
 }
 
 int typewidth()
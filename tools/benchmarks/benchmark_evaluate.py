@@ -0,0 +1,90 @@
+#! /usr/bin/env python3
+"""
+Benchmarks the function evaluation of precice-aste-evaluate on random points,
+comparing the NumPy engine to the vtkArrayCalculator for the predefined functions.
+"""
+
+import argparse
+
+import numpy as np
+import vtk
+from common import loadTool, timed
+from vtk.util.numpy_support import numpy_to_vtk as n2v
+
+
+def parseArguments(args):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "-p",
+        "--points",
+        type=int,
+        default=10000000,
+        help="The number of mesh points.",
+    )
+    parser.add_argument(
+        "-f",
+        "--functions",
+        nargs="+",
+        default=["franke3d", "eggholder3d", "rosenbrock3d", "franke2d(xy)"],
+        help="The predefined functions to evaluate.",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=1 << 20,
+        help="The number of points evaluated at once by the NumPy engine.",
+    )
+    parser.add_argument(
+        "--skip-reference",
+        action="store_true",
+        help="Only time the NumPy engine.",
+    )
+    return parser.parse_args(args)
+
+
+def generatePointCloud(points):
+    """A vtkUnstructuredGrid without cells containing random points in the unit cube"""
+    coords = np.random.default_rng(0).random((points, 3))
+    vtk_points = vtk.vtkPoints()
+    vtk_points.SetData(n2v(coords))
+    grid = vtk.vtkUnstructuredGrid()
+    grid.SetPoints(vtk_points)
+    return grid
+
+
+def main(argv):
+    args = parseArguments(argv[1:])
+    evaluate = loadTool("precice-aste-evaluate")
+    Calculator, FunctionCompiler = evaluate.Calculator, evaluate.FunctionCompiler
+    functions = Calculator.create_predeffunctions()
+
+    grid = generatePointCloud(args.points)
+    print(f"Evaluating on {args.points} points")
+    points = evaluate.v2n(grid.GetPoints().GetData())
+    for name in args.functions:
+        function = FunctionCompiler.compile(functions[name])
+        values, _ = timed(
+            f"{name} (numpy)",
+            FunctionCompiler.evaluate,
+            function,
+            points,
+            args.chunk_size,
+        )
+        if args.skip_reference:
+            continue
+        reference, _ = timed(
+            f"{name} (vtkArrayCalculator)",
+            Calculator.evaluate_function,
+            grid,
+            functions[name],
+            "vtk",
+        )
+        deviation = np.max(np.abs(values - reference))
+        print("{:<40} {:10.3e}".format("max. deviation", deviation))
+    return 0
+
+
+if __name__ == "__main__":
+    import sys
+
+    sys.exit(main(sys.argv))
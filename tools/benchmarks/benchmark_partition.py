@@ -0,0 +1,132 @@
+#! /usr/bin/env python3
+"""
+Benchmarks MeshPartitioner.apply_partition of precice-aste-partition on a structured tetrahedral
+mesh against the former implementation, which mapped every point through a Python dictionary.
+"""
+
+import argparse
+
+import numpy as np
+from common import loadTool, timed
+
+
+def parseArguments(args):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "-p",
+        "--points",
+        type=int,
+        default=5000000,
+        help="Approximate number of mesh points.",
+    )
+    parser.add_argument(
+        "-n", "--numparts", type=int, default=64, help="The number of partitions."
+    )
+    parser.add_argument(
+        "--skip-reference",
+        action="store_true",
+        help="Only time the array based implementation.",
+    )
+    return parser.parse_args(args)
+
+
+def generateTetraMesh(points):
+    """A unit cube with n^3 points where every hexahedron is split into six tetrahedra"""
+    n = max(2, int(round(points ** (1 / 3))))
+    axis = np.linspace(0, 1, n)
+    coords = np.stack(np.meshgrid(axis, axis, axis, indexing="ij"), -1).reshape(-1, 3)
+    ids = np.arange(n**3).reshape(n, n, n)
+    base = ids[:-1, :-1, :-1].ravel()
+    steps = (n * n, n, 1)
+    tetras = []
+    for a, b, c in [(0, 1, 2), (0, 2, 1), (1, 0, 2), (1, 2, 0), (2, 0, 1), (2, 1, 0)]:
+        tetras.append(
+            np.stack(
+                [
+                    base,
+                    base + steps[a],
+                    base + steps[a] + steps[b],
+                    base + steps[a] + steps[b] + steps[c],
+                ],
+                -1,
+            )
+        )
+    connectivity = np.concatenate(tetras).ravel()
+    offsets = np.arange(0, len(connectivity) + 1, 4)
+    return coords, offsets, connectivity
+
+
+def applyPartitionReference(points, cells, cell_types, part, numparts):
+    """The former dictionary based implementation of MeshPartitioner.apply_partition"""
+    meshes = [
+        {"points": [], "data_index": [], "cells": [], "cell_types": []}
+        for _ in range(numparts)
+    ]
+    mapping = {}
+    for i, point in enumerate(points):
+        partition = part[i]
+        selected = meshes[partition]
+        mapping[i] = (partition, len(selected["points"]))
+        selected["points"].append(point)
+        selected["data_index"].append(i)
+
+    discarded_cells = []
+    discarded_cell_types = []
+    for cell, type in zip(cells, cell_types):
+        partitions = list(map(lambda idx: mapping[idx][0], cell))
+        if len(set(partitions)) == 1:
+            meshes[partitions[0]]["cells"].append(
+                tuple([mapping[gidx][1] for gidx in cell])
+            )
+            meshes[partitions[0]]["cell_types"].append(type)
+        else:
+            discarded_cells.append(list(cell))
+            discarded_cell_types.append(type)
+    return meshes, discarded_cells
+
+
+def main(argv):
+    args = parseArguments(argv[1:])
+    partitioner = loadTool("precice-aste-partition")
+
+    coords, offsets, connectivity = generateTetraMesh(args.points)
+    cell_types = np.full(len(offsets) - 1, 10, dtype=np.uint8)  # VTK_TETRA
+    mesh = partitioner.Mesh(coords, offsets, connectivity, cell_types)
+    # Slabs along x, this leaves most cells within a single partition
+    part = np.minimum((coords[:, 0] * args.numparts).astype(int), args.numparts - 1)
+    print(f"{mesh} into {args.numparts} parts")
+
+    (meshes, recovery_info), _ = timed(
+        "apply_partition (arrays)",
+        partitioner.MeshPartitioner.apply_partition,
+        mesh,
+        part,
+        args.numparts,
+    )
+    if args.skip_reference:
+        return 0
+
+    points = [tuple(point) for point in coords.tolist()]
+    cells = [tuple(cell) for cell in connectivity.reshape(-1, 4).tolist()]
+    (reference, discarded_cells), _ = timed(
+        "apply_partition (dictionary)",
+        applyPartitionReference,
+        points,
+        cells,
+        cell_types.tolist(),
+        part.tolist(),
+        args.numparts,
+    )
+
+    assert len(discarded_cells) == len(recovery_info["cell_types"])
+    for new, old in zip(meshes, reference):
+        assert np.array_equal(new.data_index, old["data_index"])
+        assert np.array_equal(new.cell_connectivity, np.ravel(old["cells"]))
+    print("Results of both implementations agree")
+    return 0
+
+
+if __name__ == "__main__":
+    import sys
+
+    sys.exit(main(sys.argv))
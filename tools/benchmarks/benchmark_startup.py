@@ -0,0 +1,84 @@
+#! /usr/bin/env python3
+"""
+Measures the startup time of the python tools of ASTE for command lines which do not
+need to read any mesh (e.g. --help). The import times are taken from python -X importtime.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from common import SRC_DIR
+
+COMMANDS = {
+    "precice-aste-evaluate": [["--help"], ["--list-functions"]],
+    "precice-aste-partition": [["--help"]],
+    "precice-aste-join": [["--help"]],
+}
+
+
+def parseArguments(args):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "-r",
+        "--repetitions",
+        type=int,
+        default=5,
+        help="The number of runs per command, the median wall time is reported.",
+    )
+    parser.add_argument(
+        "-t",
+        "--top",
+        type=int,
+        default=5,
+        help="The number of most expensive imports to list per command.",
+    )
+    return parser.parse_args(args)
+
+
+def parseImportTimes(stderr):
+    """Returns the cumulative import time in seconds per top-level module"""
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        if not name.startswith("  "):  # Only modules imported by the tool itself
+            times[name.strip()] = int(cumulative) * 1e-6
+    return times
+
+
+def runCommand(tool, arguments):
+    command = [sys.executable, "-X", "importtime", os.path.join(SRC_DIR, tool)]
+    start = time.perf_counter()
+    result = subprocess.run(
+        command + arguments,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    return time.perf_counter() - start, parseImportTimes(result.stderr)
+
+
+def main(argv):
+    args = parseArguments(argv[1:])
+    for tool, commands in COMMANDS.items():
+        for arguments in commands:
+            runs = [runCommand(tool, arguments) for _ in range(args.repetitions)]
+            wall = statistics.median(elapsed for elapsed, _ in runs)
+            imports = runs[-1][1]
+            label = " ".join([tool] + arguments)
+            print("{:<50} {:10.3f} s".format(label, wall))
+            if any(name.split(".")[0] in ["vtk", "vtkmodules"] for name in imports):
+                print("  imports VTK")
+            ranking = sorted(imports.items(), key=lambda item: item[1], reverse=True)
+            for name, elapsed in ranking[: args.top]:
+                print("  {:<48} {:10.3f} s".format(name, elapsed))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
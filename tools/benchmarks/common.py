@@ -0,0 +1,24 @@
+import importlib.machinery
+import importlib.util
+import os
+import time
+
+SRC_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+
+
+def loadTool(name):
+    """Imports one of the python tools in src/ (e.g. precice-aste-partition) as a module"""
+    path = os.path.join(SRC_DIR, name)
+    loader = importlib.machinery.SourceFileLoader(name.replace("-", "_"), path)
+    spec = importlib.util.spec_from_loader(loader.name, loader)
+    module = importlib.util.module_from_spec(spec)
+    loader.exec_module(module)
+    return module
+
+
+def timed(label, function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    elapsed = time.perf_counter() - start
+    print("{:<40} {:10.3f} s".format(label, elapsed))
+    return result, elapsed
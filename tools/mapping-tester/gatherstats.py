@@ -1,11 +1,15 @@
 #! /usr/bin/env python3
 
 import argparse
+import concurrent.futures
 import csv
 import glob
 import json
 import os
 
+# Invalidates cached stats gathered by former versions, e.g. with other units
+CACHE_VERSION = 2
+
 
 def parseArguments(args):
     parser = argparse.ArgumentParser(description="Gathers stats after a run")
@@ -22,45 +26,135 @@ def parseArguments(args):
         default="stats.csv",
         help="The resulting CSV file containing all stats.",
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count(),
+        help="The number of cases processed concurrently.",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Process all cases again instead of reusing the results of unchanged cases.",
+    )
+    parser.add_argument(
+        "--columnar",
+        choices=["auto", "parquet", "feather", "none"],
+        default="auto",
+        help="Additionally write the stats in a columnar format next to the CSV file. "
+        "Requires pyarrow, auto writes Parquet if pyarrow is available.",
+    )
     return parser.parse_args(args)
 
 
-def statsFromTimings(dir):
-    stats = {}
-    assert os.path.isdir(dir)
+def readEventFile(filename):
+    """
+    Reads a preCICE profiling event file, which is either a JSON document
+    or JSON lines with the meta data in the first line.
+    Returns the meta data and the list of events.
+    """
+    with open(filename, "r") as file:
+        content = file.read()
+    try:
+        document = json.loads(content)
+        return document.get("meta", {}), document.get("events", [])
+    except json.JSONDecodeError:
+        lines = [json.loads(line) for line in content.splitlines() if line.strip()]
+        return lines[0].get("meta", lines[0]), lines[1:]
+
+
+def eventDurations(events):
+    """Returns the total duration of every event in microseconds, the unit of the timestamps"""
+    names = {}
+    started = {}
+    durations = {}
+    for event in events:
+        kind = event.get("et")
+        if kind == "n":
+            names[event["eid"]] = event["en"]
+        elif kind == "b":
+            started[event["eid"]] = event["ts"]
+        elif kind == "e" and event["eid"] in started:
+            name = names.get(event["eid"], str(event["eid"]))
+            duration = event["ts"] - started.pop(event["eid"])
+            durations[name] = durations.get(name, 0.0) + float(duration)
+    return durations
+
+
+def timingsFromEvents(dir, participant="B"):
+    """
+    Parses the profiling event files of a participant and returns the total duration of
+    every event in microseconds, taking the maximum over all ranks.
+    Returns None if there are no event files.
+    """
+    files = glob.glob(os.path.join(dir, "precice-profiling", f"{participant}-*.json"))
+    if not files:
+        return None
+    timings = {}
+    for filename in files:
+        meta, events = readEventFile(filename)
+        if meta.get("name", participant) != participant:
+            continue
+        for name, duration in eventDurations(events).items():
+            timings[name] = max(timings.get(name, 0.0), duration)
+    return timings
+
+
+def timingsFromProfilingTool(dir, participant="B"):
+    """
+    Merges and exports the event files using the precice-profiling tool and aggregates
+    the exported durations like timingsFromEvents.
+    """
     assert (
         os.system("command -v precice-profiling > /dev/null") == 0
     ), 'Could not find the profiling tool "precice-profiling", which is part of the preCICE installation.'
     event_dir = os.path.join(dir, "precice-profiling")
     json_file = os.path.join(dir, "profiling.json")
-    timings_file = os.path.join(dir, "timings.csv")
+    events_file = os.path.join(dir, "events.csv")
     os.system("precice-profiling merge --output {} {}".format(json_file, event_dir))
-    os.system(
-        "precice-profiling analyze --output {} B {}".format(timings_file, json_file)
-    )
-    file = timings_file
-    if os.path.isfile(file):
-        try:
-            timings = {}
-            with open(file, "r") as csvfile:
-                timings = csv.reader(csvfile)
-                for row in timings:
-                    if row[0] == "_GLOBAL":
-                        stats["globalTime"] = row[-1]
-                    if row[0] == "initialize":
-                        stats["initializeTime"] = row[-1]
-                    if row[0].startswith("initialize/map") and row[0].endswith(
-                        "computeMapping.FromA-MeshToB-Mesh"
-                    ):
-                        computeMappingName = row[0]
-                        stats["computeMappingTime"] = row[-1]
-                    if row[0].startswith("advance/map") and row[0].endswith(
-                        "mapData.FromA-MeshToB-Mesh"
-                    ):
-                        mapDataName = row[0]
-                        stats["mapDataTime"] = row[-1]
-        except BaseException:
-            pass
+    os.system("precice-profiling export --output {} {}".format(events_file, json_file))
+    durations = {}
+    try:
+        with open(events_file, "r") as csvfile:
+            for row in csv.DictReader(csvfile):
+                if row["participant"] != participant:
+                    continue
+                key = (row["rank"], row["event"])
+                durations[key] = durations.get(key, 0.0) + float(row["duration"])
+    except (OSError, KeyError, ValueError) as error:
+        print(f"Could not read the exported events {events_file}: {error}")
+    timings = {}
+    for (_, name), duration in durations.items():
+        timings[name] = max(timings.get(name, 0.0), duration)
+    return timings
+
+
+def statsFromTimings(dir):
+    """Selected timings of participant B in microseconds"""
+    stats = {}
+    assert os.path.isdir(dir)
+    try:
+        timings = timingsFromEvents(dir)
+    except (OSError, ValueError, KeyError, IndexError) as error:
+        print(f"Could not parse the event files in {dir}: {error}")
+        timings = None
+    if timings is None:
+        timings = timingsFromProfilingTool(dir)
+
+    for name, time in timings.items():
+        if name == "_GLOBAL":
+            stats["globalTime"] = time
+        if name == "initialize":
+            stats["initializeTime"] = time
+        if name.startswith("initialize/map") and name.endswith(
+            "computeMapping.FromA-MeshToB-Mesh"
+        ):
+            stats["computeMappingTime"] = time
+        if name.startswith("advance/map") and name.endswith(
+            "mapData.FromA-MeshToB-Mesh"
+        ):
+            stats["mapDataTime"] = time
     return stats
 
 
@@ -74,13 +168,142 @@ def memoryStats(dir):
             try:
                 with open(memfile, "r") as file:
                     total = sum([float(e) / 1.0 for e in file.readlines()])
-            except BaseException:
-                pass
+            except (OSError, ValueError) as error:
+                print(f"Could not read the memory log {memfile}: {error}")
         stats[f"peakMem{P}"] = total
 
     return stats
 
 
+def readTimeLog(filename):
+    """
+    Reads the lines written by /usr/bin/time using the TIME_FORMAT of generate.py,
+    one line per rank. Other lines, e.g. about non-zero exit codes, are skipped.
+    """
+    ranks = []
+    if not os.path.isfile(filename):
+        return ranks
+    with open(filename, "r") as file:
+        for line in file:
+            try:
+                ranks.append([float(value) for value in line.split()])
+            except ValueError:
+                continue
+    return [values for values in ranks if len(values) == 8]
+
+
+def resourceStats(dir):
+    """
+    Resource usage of both participants and the durations of the post processing.
+    Falls back to the memory logs of former run scripts if there is no time log.
+    """
+    stats = {}
+    assert os.path.isdir(dir)
+    for P in "A", "B":
+        ranks = readTimeLog(os.path.join(dir, f"time-{P}.log"))
+        if not ranks:
+            memory = memoryStats(dir)
+            stats[f"peakMem{P}"] = memory[f"peakMem{P}"]
+            continue
+        wall, user, system, rss, fsIn, fsOut, major, minor = zip(*ranks)
+        stats[f"wallTime{P}"] = max(wall)
+        stats[f"userTime{P}"] = sum(user)
+        stats[f"sysTime{P}"] = sum(system)
+        stats[f"peakMem{P}"] = sum(rss)
+        stats[f"maxRankMem{P}"] = max(rss)
+        # File system operations are counted in blocks of 512 bytes
+        stats[f"readBytes{P}"] = int(sum(fsIn)) * 512
+        stats[f"writtenBytes{P}"] = int(sum(fsOut)) * 512
+        stats[f"majorFaults{P}"] = int(sum(major))
+        stats[f"minorFaults{P}"] = int(sum(minor))
+
+    for step in "join", "evaluate":
+        logfile = os.path.join(dir, f"{step}-time.log")
+        if os.path.isfile(logfile):
+            with open(logfile, "r") as file:
+                values = [line.strip() for line in file if line.strip()]
+            try:
+                stats[f"{step}Time"] = float(values[-1])
+            except (IndexError, ValueError):
+                pass
+    return stats
+
+
+def caseInputs(casedir):
+    """The files a case's stats are gathered from with their modification times"""
+    patterns = [
+        "*.stats.json",
+        "memory-*.log",
+        "time-*.log",
+        "*-time.log",
+        os.path.join("precice-profiling", "*"),
+    ]
+    files = [
+        path
+        for pattern in patterns
+        for path in glob.glob(os.path.join(casedir, pattern))
+    ]
+    return {
+        os.path.relpath(path, casedir): os.stat(path).st_mtime_ns
+        for path in sorted(files)
+    }
+
+
+def gatherCase(outdir, file):
+    casedir = os.path.join(outdir, os.path.dirname(file))
+    parts = os.path.normpath(file).split(os.sep)
+    assert len(parts) >= 5
+    mapping, constraint, meshes, ranks, _ = parts[-5:]
+    meshA, meshB = meshes.split("-")
+    ranksA, ranksB = ranks.split("-")
+
+    with open(os.path.join(outdir, file), "r") as jsonfile:
+        stats = json.load(jsonfile)
+    stats["mapping"] = mapping
+    stats["constraint"] = constraint
+    stats["mesh A"] = meshA
+    stats["mesh B"] = meshB
+    stats["ranks A"] = ranksA
+    stats["ranks B"] = ranksB
+    stats.update(statsFromTimings(casedir))
+    stats.update(resourceStats(casedir))
+    return stats
+
+
+def loadCache(filename):
+    if not os.path.isfile(filename):
+        return {}
+    try:
+        with open(filename, "r") as file:
+            cache = json.load(file)
+    except (OSError, ValueError):
+        return {}
+    if cache.get("version") != CACHE_VERSION:
+        return {}
+    return cache["cases"]
+
+
+def writeColumnar(allstats, filename, format):
+    try:
+        import pyarrow
+    except ImportError:
+        if format != "auto":
+            print(f"Writing {format} requires pyarrow, please install pyarrow.")
+        return
+    table = pyarrow.Table.from_pylist(allstats)
+    if format == "feather":
+        import pyarrow.feather
+
+        filename = os.path.splitext(filename)[0] + ".feather"
+        pyarrow.feather.write_feather(table, filename)
+    else:
+        import pyarrow.parquet
+
+        filename = os.path.splitext(filename)[0] + ".parquet"
+        pyarrow.parquet.write_table(table, filename)
+    print("Written " + filename)
+
+
 def main(argv):
     args = parseArguments(argv[1:])
 
@@ -89,35 +312,51 @@ def main(argv):
         os.path.relpath(path, args.outdir)
         for path in glob.iglob(globber, recursive=True)
     ]
-    allstats = []
-    fields = []
+
+    # Results of cases, whose input files did not change, are reused from the cache
+    cacheFile = os.path.join(args.outdir, ".gatherstats-cache.json")
+    cache = {} if args.no_cache else loadCache(cacheFile)
+    results = {}
+    inputs = {}
+    missing = []
     for file in statFiles:
         print("Found: " + file)
-        casedir = os.path.join(args.outdir, os.path.dirname(file))
-        parts = os.path.normpath(file).split(os.sep)
-        assert len(parts) >= 5
-        mapping, constraint, meshes, ranks, _ = parts[-5:]
-        meshA, meshB = meshes.split("-")
-        ranksA, ranksB = ranks.split("-")
-
-        with open(os.path.join(args.outdir, file), "r") as jsonfile:
-            stats = json.load(jsonfile)
-            stats["mapping"] = mapping
-            stats["constraint"] = constraint
-            stats["mesh A"] = meshA
-            stats["mesh B"] = meshB
-            stats["ranks A"] = ranksA
-            stats["ranks B"] = ranksB
-            stats.update(statsFromTimings(casedir))
-            stats.update(memoryStats(casedir))
-            allstats.append(stats)
-            if not fields:
-                fields += stats.keys()
+        inputs[file] = caseInputs(os.path.join(args.outdir, os.path.dirname(file)))
+        cached = cache.get(file)
+        if cached and cached["inputs"] == inputs[file]:
+            results[file] = cached["stats"]
+        else:
+            missing.append(file)
+    print(f"Processing {len(missing)} cases, reusing {len(results)} cached cases")
+
+    if args.jobs > 1 and len(missing) > 1:
+        with concurrent.futures.ProcessPoolExecutor(args.jobs) as executor:
+            for file, stats in zip(
+                missing,
+                executor.map(gatherCase, [args.outdir] * len(missing), missing),
+            ):
+                results[file] = stats
+    else:
+        for file in missing:
+            results[file] = gatherCase(args.outdir, file)
+
+    with open(cacheFile, "w") as file:
+        cases = {
+            file: {"inputs": inputs[file], "stats": results[file]} for file in statFiles
+        }
+        json.dump({"version": CACHE_VERSION, "cases": cases}, file)
+
+    allstats = [results[file] for file in statFiles]
+    fields = []
+    for stats in allstats:
+        fields += [key for key in stats.keys() if key not in fields]
 
     assert fields
     writer = csv.DictWriter(args.file, fieldnames=fields)
     writer.writeheader()
     writer.writerows(allstats)
+    if args.columnar != "none" and args.file.name != "<stdout>":
+        writeColumnar(allstats, args.file.name, args.columnar)
     return 0
 
 
@@ -99,7 +99,7 @@ def caseToSortable(case):
     return (kindCost, -mesha, -meshb)
 
 
-def createMasterRunScripts(casemap, dir, exit):
+def createMasterRunScripts(casemap, dir, exit, evaluations):
     common = [
         "#!/bin/bash",
         "",
@@ -149,15 +149,39 @@ def createMasterRunScripts(casemap, dir, exit):
             [line + "\n" for line in content]
         )
 
-        # Generate master postprocessing script
+        # Generate master postprocessing script, which joins the results of all cases
+        # and evaluates them in one batch instead of running post.sh for every case
+        jobs = []
+        for instance in instances:
+            job = dict(evaluations[(case, *instance)])
+            job["mesh"] = os.path.join(*instance, job["mesh"])
+            # The stats file is written next to the output, the mesh to the directory
+            job["output"] = job["mesh"]
+            job["directory"] = os.path.join(*instance)
+            job["time"] = os.path.join(*instance, "evaluate-time.log")
+            jobs.append(job)
+        with open(os.path.join(dir, case, "evaluate-batch.json"), "w") as file:
+            json.dump(jobs, file, indent=2)
+
+        suffix = " || exit 1" if exit else ""
         post = common + [
-            "${RUNNER} " + os.path.join(*instance, "post.sh") for instance in instances
+            "${RUNNER} " + os.path.join(*instance, "join.sh") + suffix
+            for instance in instances
         ]
+        post.append(
+            "precice-aste-evaluate --batch evaluate-batch.json --jobs ${ASTE_EVALUATE_JOBS:-1}"
+            + suffix
+        )
         open(os.path.join(dir, case, "postprocessall.sh"), "w").writelines(
             [line + "\n" for line in post]
         )
 
 
+# Per rank: wall time [s], user time [s], system time [s], max RSS [KiB],
+# file system inputs and outputs [512 byte blocks], major and minor page faults
+TIME_FORMAT = "%e %U %S %M %I %O %F %R"
+
+
 def createRunScript(outdir, path, case):
     amesh = case["A"]["mesh"]["name"]
     aranks = case["A"]["ranks"]
@@ -166,8 +190,8 @@ def createRunScript(outdir, path, case):
     )
 
     # Generate runner script
-    acmd = '/usr/bin/time -f %M -a -o memory-A.log precice-aste-run -v -a -p A --data "{}" --mesh {} || kill 0 &'.format(
-        case["function"], ameshLocation
+    acmd = '/usr/bin/time -f "{}" -a -o time-A.log precice-aste-run -v -a -p A --data "{}" --mesh {} || kill 0 &'.format(
+        TIME_FORMAT, case["function"], ameshLocation
     )
     if aranks > 1:
         acmd = "mpirun -n {} $ASTE_A_MPIARGS {}".format(aranks, acmd)
@@ -178,8 +202,8 @@ def createRunScript(outdir, path, case):
         os.path.join(outdir, "meshes", bmesh, str(branks), bmesh), path
     )
     mapped_data_name = case["function"] + "(mapped)"
-    bcmd = '/usr/bin/time -f %M -a -o memory-B.log precice-aste-run -v -a -p B --data "{}" --mesh {} --output mapped || kill 0 &'.format(
-        mapped_data_name, bmeshLocation
+    bcmd = '/usr/bin/time -f "{}" -a -o time-B.log precice-aste-run -v -a -p B --data "{}" --mesh {} --output mapped || kill 0 &'.format(
+        TIME_FORMAT, mapped_data_name, bmeshLocation
     )
     if branks > 1:
         bcmd = "mpirun -n {} $ASTE_B_MPIARGS {}".format(branks, bcmd)
@@ -189,7 +213,7 @@ def createRunScript(outdir, path, case):
         "set -e -u",
         'cd "$( dirname "${BASH_SOURCE[0]}" )"',
         "echo '=========='",
-        "rm -f memory-A.log memory-B.log done running failed",
+        "rm -f memory-A.log memory-B.log time-A.log time-B.log done running failed",
         "rm -fr mapped && mkdir mapped",
         "touch running",
         "echo '= {} ({}) {} - {}'".format(
@@ -227,7 +251,8 @@ def createRunScript(outdir, path, case):
         [line + "\n" for line in wrapper]
     )
 
-    # Generate post processing script
+    # Generate post processing scripts. join.sh only joins the mapped mesh, which allows
+    # the master scripts to evaluate all cases in one batch.
     post_content = [
         "#!/bin/bash",
         "set -e -u",
@@ -238,29 +263,40 @@ def createRunScript(outdir, path, case):
     ]
     if branks == 1:
         joincmd = "[ ! -f mapped.vtu ] || mv --update mapped.vtu mapped.vtk"
-        diffcmd = 'precice-aste-evaluate --data error --diffdata "{1}" --diff --stats --mesh mapped.vtk --function "{0}" | tee diff.log'.format(
-            case["function"], mapped_data_name
-        )
-        post_content += [joincmd, diffcmd]
+        result = "mapped.vtk"
     else:
         [recoveryFileLocation, tmpPrefix] = os.path.split(
             os.path.normpath(bmeshLocation)
         )
-        tmprecoveryFile = recoveryFileLocation + "/{}_recovery.json".format(bmesh)
-        joincmd = "precice-aste-join --mesh mapped -r {} -o result.vtk".format(
+        tmprecoveryFile = recoveryFileLocation + "/{}_recovery.npz".format(bmesh)
+        joincmd = "/usr/bin/time -f %e -o join-time.log precice-aste-join --mesh mapped -r {} -o result.vtk".format(
             tmprecoveryFile
         )
-        diffcmd = 'precice-aste-evaluate --data error --diffdata "{1}" --diff --stats --mesh result.vtk --function "{0}" | tee diff.log'.format(
-            case["function"], mapped_data_name
-        )
-        post_content += [joincmd, diffcmd]
+        result = "result.vtk"
+    diffcmd = '/usr/bin/time -f %e -o evaluate-time.log precice-aste-evaluate --data error --diffdata "{1}" --diff --stats --mesh {2} --function "{0}" | tee diff.log'.format(
+        case["function"], mapped_data_name, result
+    )
+    open(os.path.join(path, "join.sh"), "w").writelines(
+        [line + "\n" for line in post_content + [joincmd]]
+    )
     open(os.path.join(path, "post.sh"), "w").writelines(
-        [line + "\n" for line in post_content]
+        [line + "\n" for line in post_content + [joincmd, diffcmd]]
     )
 
+    # The evaluation of post.sh as job of precice-aste-evaluate --batch
+    return {
+        "mesh": result,
+        "function": case["function"],
+        "data": "error",
+        "diff": True,
+        "diffdata": mapped_data_name,
+        "stats": True,
+    }
+
 
 def setupCases(outdir, template, cases, exit):
     casemap = {}
+    evaluations = {}
     for case in cases:
         folders = getCaseFolders(case)
         casemap.setdefault(folders[0], []).append(folders[1:])
@@ -272,11 +308,11 @@ def setupCases(outdir, template, cases, exit):
         os.makedirs(path, exist_ok=True)
         with open(config, "w") as config:
             config.write(generateConfig(template, case))
-        createRunScript(outdir, path, case)
+        evaluations[tuple(folders)] = createRunScript(outdir, path, case)
     print(f"Generated {len(cases)} cases")
 
     print(f"Generating master scripts")
-    createMasterRunScripts(casemap, outdir, exit)
+    createMasterRunScripts(casemap, outdir, exit, evaluations)
 
 
 def parseArguments(args):
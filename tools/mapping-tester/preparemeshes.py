@@ -1,6 +1,8 @@
 #! /usr/bin/env python3
 
 import argparse
+import concurrent.futures
+import hashlib
 import itertools
 import json
 import os
@@ -26,25 +28,123 @@ def parseArguments(args):
     parser.add_argument(
         "-f", "--force", action="store_true", help="Remove existing meshes."
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="The number of meshes to prepare concurrently.",
+    )
+    parser.add_argument(
+        "-c",
+        "--cache",
+        default=None,
+        help="""Directory of a cache for prepared meshes, which can be shared between test suites.
+        Cached meshes are hard linked into the test suite if possible.""",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="The seed of the partitioner, which makes the partitioned meshes reproducible.",
+    )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="""Evaluate the function on all meshes in one batch run of precice-aste-evaluate,
+        which starts the tool only once. The meshes are partitioned after all of them are evaluated.""",
+    )
 
     return parser.parse_args(args)
 
 
-def prepareMainMesh(meshdir, name, file, function, force=False):
-    mainDir = os.path.join(meshdir, name, "1")
-    mainMesh = os.path.join(mainDir, name + ".vtu")
-    print("Preparing Mesh {} in {}".format(name, mainDir))
+def fileHash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cacheKey(*parts):
+    """The key of a prepared mesh, which is the hash of everything it depends on"""
+    return hashlib.sha256("\0".join(map(str, parts)).encode()).hexdigest()
+
+
+def isPrepared(directory, key):
+    """Checks if the directory contains the mesh prepared with the given key"""
+    keyfile = os.path.join(directory, ".key")
+    if not os.path.isfile(keyfile):
+        return False
+    with open(keyfile, "r") as file:
+        return file.read().strip() == key
 
-    if os.path.isdir(mainDir):
+
+def markPrepared(directory, key):
+    with open(os.path.join(directory, ".key"), "w") as file:
+        file.write(key + "\n")
+
+
+def copyTree(source, destination):
+    """Copies all files of a directory using hard links if possible"""
+    os.makedirs(destination, exist_ok=True)
+    for entry in os.scandir(source):
+        target = os.path.join(destination, entry.name)
+        try:
+            os.link(entry.path, target)
+        except OSError:
+            shutil.copy2(entry.path, target)
+
+
+def restoreFromCache(cache, key, directory):
+    if cache is None or not os.path.isdir(os.path.join(cache, key)):
+        return False
+    copyTree(os.path.join(cache, key), directory)
+    return True
+
+
+def storeInCache(cache, key, directory):
+    if cache is None:
+        return
+    # Copy to a temporary directory first, as other runs may use the cache concurrently
+    temporary = os.path.join(cache, "{}.{}.tmp".format(key, os.getpid()))
+    copyTree(directory, temporary)
+    try:
+        os.rename(temporary, os.path.join(cache, key))
+    except OSError:  # Already stored by another run
+        shutil.rmtree(temporary)
+
+
+def prepareDirectory(directory, key, cache, force, kind):
+    """
+    Prepares the directory of a mesh and returns True, if the mesh needs to be generated.
+    """
+    if os.path.isdir(directory):
         if force:
-            print("  Regenerating the mesh.")
-            shutil.rmtree(mainDir)
+            print("  Regenerating the {}.".format(kind))
+            shutil.rmtree(directory)
+        elif isPrepared(directory, key):
+            print("  {} already exists.".format(kind.capitalize()))
+            return False
         else:
-            print("  Mesh already exists.")
+            print("  {} is outdated, regenerating it.".format(kind.capitalize()))
+            shutil.rmtree(directory)
+
+    if restoreFromCache(cache, key, directory):
+        print("  Restored the {} from the cache.".format(kind))
+        return False
+    os.makedirs(directory, exist_ok=True)
+    return True
+
+
+def prepareMainMesh(meshdir, name, file, function, key, force=False, cache=None):
+    mainDir = os.path.join(meshdir, name, "1")
+    mainMesh = os.path.join(mainDir, name + ".vtu")
+    print("Preparing Mesh {} in {}".format(name, mainDir))
 
-            return
+    if not prepareDirectory(mainDir, key, cache, force, "mesh"):
+        return
 
-    os.makedirs(mainDir, exist_ok=True)
     data_name = "{}".format(function)
     [pathName, tmpfilename] = os.path.split(os.path.normpath(mainMesh))
     subprocess.run(
@@ -60,48 +160,183 @@ def prepareMainMesh(meshdir, name, file, function, force=False):
             pathName,
             "-o",
             tmpfilename,
-        ]
+        ],
+        check=True,
     )
+    markPrepared(mainDir, key)
+    storeInCache(cache, key, mainDir)
 
 
-def preparePartMesh(meshdir, name, p, force=False):
+def prepareMainMeshes(meshdir, meshes, function, keys, args):
+    """
+    Prepares the main meshes. The function is evaluated on all missing meshes by one
+    batch run of precice-aste-evaluate, which reads every mesh file only once.
+    """
+    jobs = []
+    for name, file in meshes:
+        mainDir = os.path.join(meshdir, name, "1")
+        print("Preparing Mesh {} in {}".format(name, mainDir))
+        if prepareDirectory(mainDir, keys[name], args.cache, args.force, "mesh"):
+            jobs.append(
+                {
+                    "mesh": os.path.expandvars(file),
+                    "function": function,
+                    "data": "{}".format(function),
+                    "directory": mainDir,
+                    "output": name + ".vtu",
+                }
+            )
 
-    if p == 1:
+    if not jobs:
         return
 
-    mainMesh = os.path.join(meshdir, name, "1", name + ".vtu")
-    partDir = os.path.join(meshdir, name, str(p))
-    partMesh = os.path.join(partDir, name)
-    print("Preparing Mesh {} with {} paritions in {}".format(name, p, partDir))
+    batchFile = os.path.join(meshdir, "evaluate-batch.json")
+    with open(batchFile, "w") as file:
+        json.dump(jobs, file, indent=2)
+    subprocess.run(
+        [
+            "precice-aste-evaluate",
+            "--batch",
+            batchFile,
+            "--jobs",
+            str(max(args.jobs, 1)),
+        ],
+        check=True,
+    )
+    os.remove(batchFile)
+    for job in jobs:
+        name = os.path.basename(os.path.dirname(job["directory"]))
+        markPrepared(job["directory"], keys[name])
+        storeInCache(args.cache, keys[name], job["directory"])
 
-    if os.path.isdir(partDir):
-        if force:
-            print("  Regenerating the partitioned mesh.")
-            shutil.rmtree(partDir)
+
+def nestedChains(partitions):
+    """
+    Splits the numbers of partitions into chains, in which every number divides the next one.
+    The partitioner creates the levels of such a chain as nested partitionings in one run.
+    """
+    chains = []
+    for p in sorted(set(partitions)):
+        if p == 1:
+            continue
+        # Extend the chain with the finest level dividing p
+        candidates = [chain for chain in chains if p % chain[-1] == 0]
+        if candidates:
+            max(candidates, key=lambda chain: chain[-1]).append(p)
         else:
-            print("  Partitioned mesh already exists.")
+            chains.append([p])
+    return chains
 
-            return
 
-    os.makedirs(partDir, exist_ok=True)
-    [pathName, tmpfilename] = os.path.split(os.path.normpath(partMesh))
-    subprocess.run(
-        [
-            "precice-aste-partition",
-            "--mesh",
-            mainMesh,
-            "--algorithm",
-            "meshfree",
-            "-o",
-            partMesh,
-            "--directory",
-            pathName,
-            "-n",
-            str(p),
-        ]
+def partitionKeys(mainKey, partitions, algorithm, seed):
+    """
+    The keys of the partitionings. A level of a chain is nested into the coarser levels of
+    the chain, hence its key depends on them as well.
+    """
+    keys = {1: cacheKey("partition", mainKey, algorithm, seed, 1)}
+    for chain in nestedChains(partitions):
+        for i, p in enumerate(chain):
+            keys[p] = cacheKey("partition", mainKey, algorithm, seed, *chain[: i + 1])
+    return keys
+
+
+def preparePartMeshes(
+    meshdir, name, keys, force=False, cache=None, algorithm="meshfree", seed=0
+):
+    """
+    Prepares the partitioned meshes for all numbers of partitions in keys.
+    The levels of every chain (see nestedChains) are created by one multi-level run of the
+    partitioner, which also recreates the prepared levels of a chain with missing levels.
+    """
+    mainMesh = os.path.join(meshdir, name, "1", name + ".vtu")
+    for chain in nestedChains(keys):
+        missing = []
+        for p in chain:
+            partDir = os.path.join(meshdir, name, str(p))
+            print("Preparing Mesh {} with {} paritions in {}".format(name, p, partDir))
+            if prepareDirectory(partDir, keys[p], cache, force, "partitioned mesh"):
+                missing.append(p)
+
+        if not missing:
+            continue
+
+        # The missing levels are nested into the coarser ones, which are partitioned again
+        levels = [p for p in chain if p <= max(missing)]
+        for p in levels:
+            if p not in missing:
+                partDir = os.path.join(meshdir, name, str(p))
+                print(
+                    "  Regenerating {} with the nested partitionings.".format(partDir)
+                )
+                shutil.rmtree(partDir)
+                os.makedirs(partDir)
+        subprocess.run(
+            [
+                "precice-aste-partition",
+                "--mesh",
+                mainMesh,
+                "--algorithm",
+                algorithm,
+                "-o",
+                name,
+                "--directory",
+                os.path.join(meshdir, name, "{n}"),
+                "-n",
+                ",".join(map(str, levels)),
+                "--seed",
+                str(seed),
+            ],
+            check=True,
+        )
+        for p in levels:
+            partDir = os.path.join(meshdir, name, str(p))
+            markPrepared(partDir, keys[p])
+            storeInCache(cache, keys[p], partDir)
+
+
+def submitPartMeshes(meshdir, name, mainKey, partitions, args, executor):
+    """Submits the partitionings of a prepared main mesh to the executor"""
+    algorithm = "meshfree"
+    keys = partitionKeys(mainKey, partitions, algorithm, args.seed)
+    return executor.submit(
+        preparePartMeshes,
+        meshdir,
+        name,
+        keys,
+        args.force,
+        args.cache,
+        algorithm,
+        args.seed,
     )
 
 
+def prepareMesh(meshdir, name, file, function, partitions, args, executor):
+    """
+    Prepares the main mesh and submits the partitionings, which depend on it, to the executor.
+    Returns the futures of the partitionings.
+    """
+    mainKey = cacheKey("mesh", fileHash(os.path.expandvars(file)), function)
+    prepareMainMesh(meshdir, name, file, function, mainKey, args.force, args.cache)
+    return [submitPartMeshes(meshdir, name, mainKey, partitions, args, executor)]
+
+
+def prepareMeshesBatch(meshdir, meshes, function, partitions, args, executor):
+    """
+    Prepares all main meshes in one batch and submits the partitionings of all meshes
+    to the executor afterwards. Returns the futures of the partitionings.
+    """
+    hashes = executor.map(fileHash, [os.path.expandvars(file) for _, file in meshes])
+    mainKeys = {
+        name: cacheKey("mesh", digest, function)
+        for (name, _), digest in zip(meshes, hashes)
+    }
+    prepareMainMeshes(meshdir, meshes, function, mainKeys, args)
+    return [
+        submitPartMeshes(meshdir, name, mainKeys[name], partitions, args, executor)
+        for name, _ in meshes
+    ]
+
+
 def main(argv):
     args = parseArguments(argv[1:])
     setup = json.load(args.setup)
@@ -116,19 +351,44 @@ def main(argv):
         [int(rank) for pranks in setup["general"]["ranks"].values() for rank in pranks]
     )
 
-    for name, file in set(
+    meshes = set(
         itertools.chain(
             setup["general"]["meshes"]["A"].items(),
             setup["general"]["meshes"]["B"].items(),
         )
-    ):
-
+    )
+    for name, file in meshes:
         if not os.path.isfile(os.path.expandvars(file)):
             raise Exception(f'\033[91m Unable to open file called "{file}".\033[0m')
-        prepareMainMesh(meshdir, name, file, function, args.force)
+    if args.cache:
+        os.makedirs(args.cache, exist_ok=True)
 
-        for p in partitions:
-            preparePartMesh(meshdir, name, p, args.force)
+    # The tools run as subprocesses, hence threads suffice to run them concurrently
+    with concurrent.futures.ThreadPoolExecutor(max(args.jobs, 1)) as executor:
+        if args.batch:
+            os.makedirs(meshdir, exist_ok=True)
+            partFutures = prepareMeshesBatch(
+                meshdir, meshes, function, partitions, args, executor
+            )
+        else:
+            mainFutures = [
+                executor.submit(
+                    prepareMesh,
+                    meshdir,
+                    name,
+                    file,
+                    function,
+                    partitions,
+                    args,
+                    executor,
+                )
+                for name, file in meshes
+            ]
+            partFutures = []
+            for future in concurrent.futures.as_completed(mainFutures):
+                partFutures += future.result()
+        for future in concurrent.futures.as_completed(partFutures):
+            future.result()
 
     return 0
 
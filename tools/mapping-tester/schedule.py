@@ -0,0 +1,179 @@
+#! /usr/bin/env python3
+
+import argparse
+import glob
+import os
+import subprocess
+import time
+
+from generate import caseToSortable
+
+
+def parseArguments(args):
+    parser = argparse.ArgumentParser(
+        description="Runs the cases of a generated test suite concurrently"
+    )
+    parser.add_argument(
+        "-o",
+        "--outdir",
+        default="cases",
+        help="Directory of the generated test suite.",
+    )
+    parser.add_argument(
+        "-c",
+        "--cores",
+        type=int,
+        default=os.cpu_count(),
+        help="The number of cores to use. A case uses as many cores as ranks of A and B.",
+    )
+    parser.add_argument(
+        "--rerun-failed",
+        action="store_true",
+        help="Run cases again, which failed in a previous run.",
+    )
+    parser.add_argument(
+        "--no-post",
+        action="store_true",
+        help="Do not run the post processing of finished cases.",
+    )
+    parser.add_argument(
+        "-e",
+        "--exit",
+        action="store_true",
+        help="Do not start new cases, if one of the cases fails.",
+    )
+    parser.add_argument(
+        "--poll",
+        type=float,
+        default=1.0,
+        help="Interval in seconds to check for finished cases.",
+    )
+    return parser.parse_args(args)
+
+
+def findCases(outdir):
+    """Returns the generated cases as paths relative to the outdir"""
+    cases = []
+    for root, dirs, files in os.walk(outdir):
+        if "run-wrapper.sh" in files:
+            cases.append(os.path.relpath(root, outdir))
+            dirs.clear()
+    return cases
+
+
+def caseCores(case):
+    """The number of cores required by a case, which are the ranks of A and B"""
+    ranksA, ranksB = map(int, os.path.basename(case).split("-"))
+    return ranksA + ranksB
+
+
+def caseOrder(case):
+    try:
+        return caseToSortable(case)
+    except ValueError:  # Mesh names which are not mesh widths
+        return (0, 0, 0)
+
+
+def isPostprocessed(path):
+    return bool(glob.glob(os.path.join(path, "*.stats.json")))
+
+
+def start(path, script, log=None):
+    """Starts a script of a case, the output is discarded if no log is given"""
+    if log is None:
+        return subprocess.Popen(
+            ["/bin/bash", script],
+            cwd=path,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+    with open(os.path.join(path, log), "w") as logfile:
+        return subprocess.Popen(
+            ["/bin/bash", script], cwd=path, stdout=logfile, stderr=subprocess.STDOUT
+        )
+
+
+def schedule(args):
+    outdir = os.path.normpath(args.outdir)
+    cases = sorted(findCases(outdir), key=caseOrder, reverse=True)
+    print(f"Found {len(cases)} cases using {args.cores} cores")
+
+    pending = []
+    postpending = []
+    skipped = 0
+    for case in cases:
+        path = os.path.join(outdir, case)
+        if os.path.exists(os.path.join(path, "done")):
+            if not args.no_post and not isPostprocessed(path):
+                postpending.append(case)
+            skipped += 1
+        elif os.path.exists(os.path.join(path, "failed")) and not args.rerun_failed:
+            skipped += 1
+        else:
+            pending.append(case)
+    print(f"Skipping {skipped} cases of previous runs")
+
+    # Maps the running processes to the case and whether it is the post processing
+    running = {}
+    used = 0
+    done, failed, postfailed = 0, 0, 0
+    while pending or postpending or running:
+        # Post processing has priority and starts before new cases, each one uses one core
+        while postpending and used < args.cores:
+            case = postpending.pop(0)
+            print(f"Post processing {case}")
+            process = start(os.path.join(outdir, case), "post.sh", "post.log")
+            running[process] = (case, True)
+            used += 1
+
+        while pending and not (args.exit and failed):
+            # Start the longest case which fits, or any case if nothing is running
+            fits = [case for case in pending if used + caseCores(case) <= args.cores]
+            if not fits and running:
+                break
+            case = fits[0] if fits else pending[0]
+            pending.remove(case)
+            print(f"Starting {case}")
+            # The wrapper writes the output to run.log itself
+            process = start(os.path.join(outdir, case), "run-wrapper.sh")
+            running[process] = (case, False)
+            used += caseCores(case)
+
+        if args.exit and failed:
+            pending.clear()
+
+        time.sleep(args.poll)
+        for process in [process for process in running if process.poll() is not None]:
+            case, isPost = running.pop(process)
+            path = os.path.join(outdir, case)
+            if isPost:
+                used -= 1
+                if process.returncode != 0:
+                    postfailed += 1
+                    print(f"Post processing of {case} failed")
+                continue
+            used -= caseCores(case)
+            if process.returncode == 0 and os.path.exists(os.path.join(path, "done")):
+                done += 1
+                print(f"Finished {case}")
+                if not args.no_post:
+                    postpending.append(case)
+            else:
+                failed += 1
+                print(f"Failed {case}")
+
+    print(f"Finished {done} cases, {failed} cases failed")
+    if postfailed:
+        print(f"Post processing of {postfailed} cases failed")
+    return 1 if failed or postfailed else 0
+
+
+def main(argv):
+    args = parseArguments(argv[1:])
+    return schedule(args)
+
+
+if __name__ == "__main__":
+    import sys
+
+    sys.exit(main(sys.argv))